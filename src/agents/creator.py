@@ -1,19 +1,20 @@
-import json
-
 # --- IMPORTS ---
-# Importing AgentState from the core folder
+# Importing AgentState and the logger from the core folder
 from src.core.state import AgentState
+from src.core.logger import get_logger
+
+logger = get_logger(__name__)
 
-def creator_node(state: AgentState) -> AgentState:
+def creator_node(state: AgentState) -> dict:
     """
     The final agent in the workflow. It assembles the complete marketing brief.
     
     This node performs the following steps:
     1. Reads all the generated content from the state (weather, food, events, messages).
     2. Constructs a final dictionary, the "brief".
-    3. Updates the agent state with this final brief.
+    3. Returns a state update containing only this final brief.
     """
-    print("--- AGENT: CREATOR ---")
+    logger.info("--- AGENT: CREATOR ---")
 
     # 1. Read all the necessary data from the state
     weather_summary = state.get("weather_summary")
@@ -24,9 +25,8 @@ def creator_node(state: AgentState) -> AgentState:
     # Safeguard against missing data
     if not all([weather_summary, food_recommendation, events, message_ideas]):
         error_message = "Creator node is missing required data from previous nodes."
-        print(error_message)
-        state["errors"].append(error_message)
-        return state
+        logger.error(error_message)
+        return {"errors": [error_message]}
 
     # 2. Construct the final brief
     brief = {
@@ -36,9 +36,7 @@ def creator_node(state: AgentState) -> AgentState:
         "message_ideas": message_ideas,
     }
 
-    print(f"Creator Output:\n{json.dumps(brief, indent=2)}")
+    logger.debug("Creator Output: %s", brief)
 
-    # 3. Update the state with the final brief
-    state["brief"] = brief
-    
-    return state
\ No newline at end of file
+    # 3. Return the final brief as a partial state update
+    return {"brief": brief}
@@ -1,17 +1,16 @@
 import json
-from langchain_openai import ChatOpenAI
 
 # --- IMPORTS ---
-# Importing AgentState from the core folder
+# Importing AgentState, the shared LLM invocation layer and the logger from the core folder
 from src.core.state import AgentState
+from src.core.llm import invoke_llm, LLMCallError
+from src.core.logger import get_logger
 # Importing tools from the tools folder (file name is tools.py)
 from src.tools.tools import get_weather, perform_internet_search, parse_rss_feeds
 
-# Initialize the LLM
-# Using a specific model and a temperature of 0 for predictable, factual outputs.
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+logger = get_logger(__name__)
 
-def scout_node(state: AgentState) -> AgentState:
+def scout_node(state: AgentState) -> dict:
     """
     The first agent in the workflow. It scans for local opportunities.
     
@@ -21,9 +20,9 @@ def scout_node(state: AgentState) -> AgentState:
     3. Compiles the raw data into a single string.
     4. Creates a detailed prompt instructing the LLM to analyze the data and extract key information.
     5. Invokes the LLM to generate a JSON object containing the weather summary and top 5 events.
-    6. Updates the agent state with the extracted information.
+    6. Returns a state update containing only the extracted information.
     """
-    print("--- AGENT: SCOUT ---")
+    logger.info("--- AGENT: SCOUT ---")
 
     # 1. Define search parameters
     location = "Glasgow, UK"
@@ -90,7 +89,13 @@ def scout_node(state: AgentState) -> AgentState:
     """
 
     # 5. Invoke the LLM to get the scout brief
-    response = llm.invoke(prompt)
+    # A temperature of 0 keeps the outputs predictable and factual.
+    try:
+        response = invoke_llm(prompt, temperature=0)
+    except LLMCallError as e:
+        error_message = f"LLM call failed in scout_node: {e}"
+        logger.error(error_message)
+        return {"errors": [error_message]}
 
     try:
         # The LLM's response content is a string that often includes ```json ... ```
@@ -105,17 +110,17 @@ def scout_node(state: AgentState) -> AgentState:
             json_response_string = content[json_start_index:json_end_index+1]
             scout_data = json.loads(json_response_string)
 
-            print(f"Scout Output:\n{scout_data}")
+            logger.debug("Scout Output: %s", scout_data)
             
-            # 6. Update the state
-            state["weather_summary"] = scout_data.get("weather_summary")
-            state["events"] = scout_data.get("events")
-            return state
+            # 6. Return only the keys this node produces
+            return {
+                "weather_summary": scout_data.get("weather_summary"),
+                "events": scout_data.get("events"),
+            }
         else:
             raise ValueError("No JSON object found in the LLM response.")
 
     except (ValueError, json.JSONDecodeError) as e:
         error_message = f"Error parsing JSON from scout_node: {e}\nLLM Response:\n{response.content}"
-        print(error_message)
-        state["errors"].append(error_message)
-        return state
\ No newline at end of file
+        logger.error(error_message)
+        return {"errors": [error_message]}
\ No newline at end of file
@@ -1,35 +1,44 @@
 import json
-from langchain_openai import ChatOpenAI
 
 # --- IMPORTS ---
-# Importing AgentState from the core folder
+# Importing AgentState, the content store, the shared LLM invocation layer and the logger from the core folder
 from src.core.state import AgentState
+from src.core.store import get_content
+from src.core.llm import invoke_llm, LLMCallError
+from src.core.logger import get_logger
 
-# Initialize the LLM
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+logger = get_logger(__name__)
 
-def strategist_node(state: AgentState) -> AgentState:
+def strategist_node(state: AgentState) -> dict:
     """
     The second agent in the workflow. It creates a marketing strategy.
     
     This node performs the following steps:
-    1. Reads the `weather_summary`, `events`, and `cafe_context` from the state.
+    1. Reads the `weather_summary` and `events` from the state, and the cafe context from the content store.
     2. Creates a detailed prompt that instructs the LLM to act as a marketing strategist.
     3. The prompt asks the LLM to generate a food recommendation based on the weather and five message ideas based on the events.
     4. Invokes the LLM to generate a JSON object with the food recommendation and message ideas.
-    5. Updates the `food_recommendation` and `message_ideas` in the agent state.
+    5. Returns a state update containing only the `food_recommendation` and `message_ideas`.
     """
-    print("--- AGENT: STRATEGIST ---")
+    logger.info("--- AGENT: STRATEGIST ---")
 
     # 1. Read the necessary data from the state
     weather_summary = state["weather_summary"]
     events = state["events"]
-    cafe_context = state["cafe_context"]
 
     # This check is a safeguard. The weather_summary and events should always be present.
     if weather_summary is None or events is None:
-        state["errors"].append("Weather summary or events are missing.")
-        return state
+        error_message = "Weather summary or events are missing."
+        logger.error(error_message)
+        return {"errors": [error_message]}
+
+    # The playbook is held by reference, so it is only looked up where it is needed
+    try:
+        cafe_context = get_content(state["cafe_context_ref"])
+    except KeyError:
+        error_message = "Cafe context could not be found in the content store."
+        logger.error(error_message)
+        return {"errors": [error_message]}
 
     # 2. Create the detailed prompt for the LLM
     prompt = f"""
@@ -71,7 +80,12 @@ def strategist_node(state: AgentState) -> AgentState:
     """
 
     # 4. Invoke the LLM
-    response = llm.invoke(prompt)
+    try:
+        response = invoke_llm(prompt, temperature=0)
+    except LLMCallError as e:
+        error_message = f"LLM call failed in strategist_node: {e}"
+        logger.error(error_message)
+        return {"errors": [error_message]}
 
     try:
         content = str(response.content)
@@ -84,17 +98,17 @@ def strategist_node(state: AgentState) -> AgentState:
             json_response_string = content[json_start_index:json_end_index+1]
             strategist_data = json.loads(json_response_string)
 
-            print(f"Strategist Output:\n{strategist_data}")
+            logger.debug("Strategist Output: %s", strategist_data)
             
-            # 5. Update the state
-            state["food_recommendation"] = strategist_data.get("food_recommendation")
-            state["message_ideas"] = strategist_data.get("message_ideas")
-            return state
+            # 5. Return only the keys this node produces
+            return {
+                "food_recommendation": strategist_data.get("food_recommendation"),
+                "message_ideas": strategist_data.get("message_ideas"),
+            }
         else:
             raise ValueError("No JSON object found in the LLM response.")
 
     except (ValueError, json.JSONDecodeError) as e:
         error_message = f"Error parsing JSON from strategist_node: {e}\nLLM Response:\n{response.content}"
-        print(error_message)
-        state["errors"].append(error_message)
-        return state
\ No newline at end of file
+        logger.error(error_message)
+        return {"errors": [error_message]}
\ No newline at end of file
@@ -5,7 +5,7 @@ This is the main application script. It runs the entire agent workflow.
 This script does the following:
 1.  Imports the compiled LangGraph app object.
 2.  Loads the cafe context from the .md file.
-3.  Defines the initial state for the workflow.
+3.  Stores the cafe context by content hash and defines the initial state for the workflow.
 4.  Invokes the agent graph to run the full process.
 5.  Checks the final state for errors or a final post.
 6.  If successful, it calls the notifier to send the post to Discord.
@@ -13,15 +13,23 @@ This script does the following:
 
 from src.core.graph import app
 from src.core.state import AgentState
+from src.core.store import pin_content, release_content
+from src.core.logger import get_logger
 from src.tools.notifier import send_to_discord
 
+# A fixed name keeps this logger under "src" when the module is run directly as __main__
+logger = get_logger("src.app")
+
 def run_workflow(cafe_context: str):
     """
     Defines initial state and runs the agent workflow using the provided context.
     """
     # 1. Define the initial state for the workflow
+    # The playbook is stored once and passed around by its content hash.
+    # It stays pinned in the store until the graph has finished with it.
+    cafe_context_ref = pin_content(cafe_context)
     initial_state = AgentState(
-        cafe_context=cafe_context,
+        cafe_context_ref=cafe_context_ref,
         weather_summary=None,
         food_recommendation=None,
         events=None,
@@ -30,33 +38,34 @@ def run_workflow(cafe_context: str):
         errors=[]
     )
 
-    print("🚀 Starting AI Marketing Assistant Workflow...")
+    logger.info("🚀 Starting AI Marketing Assistant Workflow...")
 
     # 2. Invoke the graph
-    final_state = app.invoke(initial_state)
+    try:
+        final_state = app.invoke(initial_state)
+    finally:
+        release_content(cafe_context_ref)
 
-    print("\n🏁 Workflow Finished.")
-    print("--------------------")
+    logger.info("🏁 Workflow Finished.")
 
     # 3. Check for errors and get the final brief
     if not final_state:
-        print("❌ Workflow failed to return a final state.")
+        logger.error("❌ Workflow failed to return a final state.")
         return None
 
     errors = final_state.get("errors", [])
     brief = final_state.get("brief")
 
     if errors:
-        print("\nErrors encountered:")
         for error in errors:
-            print(f"- {error}")
+            logger.error("Workflow error: %s", error)
         return None # Return None if there were errors
     
     if not brief:
-        print("\n❌ Workflow finished, but no brief was generated.")
+        logger.error("❌ Workflow finished, but no brief was generated.")
         return None
 
-    print("Final post generated successfully.")
+    logger.info("Final post generated successfully.")
     # 4. Call the notifier to send the post to Discord
     send_to_discord(brief)
     
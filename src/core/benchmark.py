@@ -0,0 +1,206 @@
+"""
+This file benchmarks the memory allocations and time of one workflow run, per run.
+
+It runs the compiled LangGraph workflow (`app.invoke`) twice over:
+1.  "baseline": the agent nodes and AgentState loaded from an earlier git revision,
+    wired up the same way as graph.py. Pass the last commit before the change being
+    measured, e.g. the parent of the commit that introduced partial state updates.
+2.  "current": the compiled `app` from src.core.graph, exactly as run_workflow uses it.
+
+The LLM and the external APIs are replaced by the same canned responses on both sides,
+so only the workflow's own overhead is measured. Printed output is sent to os.devnull,
+which leaves out the cost of writing it to a real terminal.
+
+Run it from the root of a git checkout of the project:
+python -m src.core.benchmark <baseline_git_ref> [number_of_runs]
+"""
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import StateGraph, END
+
+# The baseline scout and strategist create a ChatOpenAI client on import, which needs a key.
+# The canned responses mean it is never used.
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+
+from src.agents import scout, strategist
+from src.core.graph import app
+from src.core.store import pin_content, release_content
+
+SCOUT_RESPONSE = AIMessage(content=json.dumps({
+    "weather_summary": "Today in Glasgow is bright and mild.",
+    "events": [{"title": f"Event {i}", "postcode": "G1 1AA"} for i in range(1, 6)],
+}))
+STRATEGIST_RESPONSE = AIMessage(content=json.dumps({
+    "food_recommendation": "Our Pistachio Iced Latte is the perfect treat!",
+    "message_ideas": [f"Message idea {i} #glasgow" for i in range(1, 6)],
+}))
+
+
+class _CannedLLM:
+    """Stands in for the baseline's ChatOpenAI client and always returns the same response."""
+
+    def __init__(self, response: AIMessage):
+        self.response = response
+
+    def invoke(self, prompt: str) -> AIMessage:
+        return self.response
+
+
+def _use_canned_tools(module: types.ModuleType) -> None:
+    module.get_weather = lambda location: "Current weather in Glasgow, UK: clear sky, Temperature: 14°C."
+    module.perform_internet_search = lambda query: f"Title: {query}\nSnippet: Something is happening."
+    module.parse_rss_feeds = lambda urls: "--- From Glasgow Live ---\nHeadline 1\nHeadline 2"
+
+
+def _use_canned_llm(module: types.ModuleType, response: AIMessage) -> None:
+    """Replaces whichever LLM entry point a node module uses: a module-level client or `invoke_llm`."""
+    if hasattr(module, "llm"):
+        module.llm = _CannedLLM(response)
+    if hasattr(module, "invoke_llm"):
+        module.invoke_llm = lambda prompt, temperature=0: response
+
+
+def _load_module_from_git(ref: str, path: str, name: str,
+                          overrides: Optional[Dict[str, types.ModuleType]] = None) -> types.ModuleType:
+    """
+    Executes a file as it was at a git revision and returns it as a module.
+    `overrides` maps module names its imports should resolve to instead of the current ones.
+    """
+    source = subprocess.run(["git", "show", f"{ref}:{path}"], capture_output=True, text=True, check=True).stdout
+    module = types.ModuleType(name)
+    module.__file__ = f"{ref}:{path}"
+    overrides = overrides or {}
+    saved = {key: sys.modules.get(key) for key in overrides}
+    sys.modules.update(overrides)
+    try:
+        exec(compile(source, module.__file__, "exec"), module.__dict__)
+    finally:
+        for key, original in saved.items():
+            if original is None:
+                sys.modules.pop(key, None)
+            else:
+                sys.modules[key] = original
+    return module
+
+
+def build_baseline(ref: str) -> Callable[[str], Dict[str, Any]]:
+    """Returns a function that runs one workflow with the nodes and state from `ref`."""
+    state = _load_module_from_git(ref, "src/core/state.py", "baseline_state")
+    # LangGraph reads each node's type hints, so the old nodes must see the old AgentState
+    overrides = {"src.core.state": state}
+    old_scout = _load_module_from_git(ref, "src/agents/scout.py", "baseline_scout", overrides)
+    old_strategist = _load_module_from_git(ref, "src/agents/strategist.py", "baseline_strategist", overrides)
+    old_creator = _load_module_from_git(ref, "src/agents/creator.py", "baseline_creator", overrides)
+
+    _use_canned_tools(old_scout)
+    _use_canned_llm(old_scout, SCOUT_RESPONSE)
+    _use_canned_llm(old_strategist, STRATEGIST_RESPONSE)
+
+    # The same wiring as graph.py
+    workflow = StateGraph(state.AgentState)
+    workflow.add_node("scout", old_scout.scout_node)
+    workflow.add_node("strategist", old_strategist.strategist_node)
+    workflow.add_node("creator", old_creator.creator_node)
+    workflow.set_entry_point("scout")
+    workflow.add_edge("scout", "strategist")
+    workflow.add_edge("strategist", "creator")
+    workflow.add_edge("creator", END)
+    baseline_app = workflow.compile()
+
+    def run(cafe_context: str) -> Dict[str, Any]:
+        return baseline_app.invoke({
+            "cafe_context": cafe_context, "weather_summary": None, "food_recommendation": None,
+            "events": None, "message_ideas": None, "brief": None, "errors": [],
+        })
+
+    return run
+
+
+def build_current() -> Callable[[str], Dict[str, Any]]:
+    """Returns a function that runs one workflow the way run_workflow does, minus the notifier."""
+    _use_canned_tools(scout)
+    _use_canned_llm(scout, SCOUT_RESPONSE)
+    _use_canned_llm(strategist, STRATEGIST_RESPONSE)
+
+    def run(cafe_context: str) -> Dict[str, Any]:
+        cafe_context_ref = pin_content(cafe_context)
+        try:
+            return app.invoke({
+                "cafe_context_ref": cafe_context_ref, "weather_summary": None, "food_recommendation": None,
+                "events": None, "message_ideas": None, "brief": None, "errors": [],
+            })
+        finally:
+            release_content(cafe_context_ref)
+
+    return run
+
+
+def measure(run: Callable[[str], Dict[str, Any]], cafe_context: str, runs: int) -> Dict[str, float]:
+    """
+    Returns the average peak and retained bytes of one run (traced with tracemalloc), and
+    the average time of one run (from a separate pass without tracing).
+    """
+    peaks: List[int] = []
+    retained: List[int] = []
+    with open(os.devnull, "w", encoding="utf-8") as sink, contextlib.redirect_stdout(sink):
+        # A warm-up run keeps one-off imports and caches out of the numbers
+        final_state = run(cafe_context)
+        if final_state.get("errors") or not final_state.get("brief"):
+            raise RuntimeError(f"Benchmark run did not produce a brief: {final_state.get('errors')}")
+
+        tracemalloc.start()
+        for _ in range(runs):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            final_state = run(cafe_context)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+            del final_state
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in range(runs):
+            run(cafe_context)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "peak_bytes": sum(peaks) / runs,
+        "retained_bytes": sum(retained) / runs,
+        "ms_per_run": elapsed / runs * 1000,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.core.benchmark <baseline_git_ref> [number_of_runs]")
+        sys.exit(2)
+    baseline_ref = sys.argv[1]
+    number_of_runs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with open("cafe_context.md", "r", encoding="utf-8") as f:
+        context = f.read()
+
+    try:
+        baseline_run = build_baseline(baseline_ref)
+    except FileNotFoundError:
+        print("Error: git was not found. The baseline is read from git, so run this from a git checkout.")
+        sys.exit(1)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: could not load the baseline from '{baseline_ref}': {e.stderr.strip() or e}")
+        sys.exit(1)
+
+    print(f"Benchmarking {number_of_runs} runs of app.invoke (baseline: {baseline_ref})")
+    for name, run in (("baseline", baseline_run), ("current", build_current())):
+        result = measure(run, context, number_of_runs)
+        print(f"{name:>9}: peak {result['peak_bytes'] / 1024:8.1f} KiB/run, "
+              f"retained {result['retained_bytes'] / 1024:8.1f} KiB/run, "
+              f"{result['ms_per_run']:.3f} ms/run")
@@ -0,0 +1,466 @@
+"""
+This file defines the shared LLM invocation layer used by the agent nodes.
+
+Instead of each agent creating its own ChatOpenAI client with no timeout, every
+prompt goes through `invoke_llm`, which adds:
+1.  A per-call deadline that bounds the total time spent on a single prompt.
+2.  A hedged duplicate request when the first one is slower than the recorded p95.
+3.  Retries with exponential backoff for failed attempts.
+4.  A fallback chain of models or endpoints (e.g. a local OpenAI-compatible server).
+5.  Per-call latency recording, so the hedging threshold can be tuned against real p99.
+
+All settings are read from environment variables (see `LLMSettings.from_env`).
+"""
+import atexit
+import json
+import logging
+import math
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+
+from src.core.logger import get_logger
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = get_logger(__name__)
+
+Number = TypeVar("Number", int, float)
+
+
+class LLMCallError(RuntimeError):
+    """Raised when every model in the fallback chain failed or the deadline ran out."""
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    """
+    One entry in the fallback chain.
+
+    Attributes:
+        model: The model name sent to the endpoint.
+        base_url: An OpenAI-compatible endpoint. None means the default OpenAI API.
+        api_key: The key for `base_url`. Only a tier without `base_url` falls back to OPENAI_API_KEY.
+    """
+    model: str
+    base_url: Optional[str] = None
+    api_key: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def label(self) -> str:
+        return f"{self.model}@{self.base_url}" if self.base_url else self.model
+
+
+# Sent to custom endpoints that have no key of their own, so OPENAI_API_KEY never leaves for them
+PLACEHOLDER_API_KEY = "not-needed"
+
+
+def _parse_tiers(spec: str) -> List[ModelTier]:
+    """
+    Parses a comma-separated chain such as "gpt-4o-mini,gpt-4o,llama3@http://localhost:11434/v1".
+
+    A custom endpoint can name the environment variable that holds its key as a third part,
+    e.g. "mixtral@https://api.example.com/v1@EXAMPLE_API_KEY". Without one it gets a placeholder key.
+    """
+    tiers = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        model, _, rest = entry.partition("@")
+        base_url, _, key_variable = rest.partition("@")
+        base_url = base_url.strip()
+        if not base_url:
+            tiers.append(ModelTier(model=model.strip()))
+            continue
+        api_key = os.getenv(key_variable.strip()) if key_variable.strip() else None
+        tiers.append(ModelTier(model=model.strip(), base_url=base_url, api_key=api_key or PLACEHOLDER_API_KEY))
+    return tiers
+
+
+def _env_number(name: str, default: Number, cast: Callable[[str], Number],
+                minimum: Optional[Number] = None, maximum: Optional[Number] = None) -> Number:
+    """
+    Reads a numeric environment variable. An unset or empty value gives `default`; an invalid
+    one logs a warning and gives `default`; an out-of-range one is clamped with a warning.
+    """
+    raw = (os.getenv(name) or "").strip()
+    if not raw:
+        return default
+    try:
+        value = cast(raw)
+        if not math.isfinite(value):
+            raise ValueError
+    except ValueError:
+        logger.warning("Invalid %s=%r, using %s instead.", name, raw, default)
+        return default
+
+    clamped = value
+    if minimum is not None:
+        clamped = max(minimum, clamped)
+    if maximum is not None:
+        clamped = min(maximum, clamped)
+    if clamped != value:
+        logger.warning("%s=%r is out of range, using %s instead.", name, raw, clamped)
+    return clamped
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Reads a yes/no environment variable, falling back to `default` with a warning if it is not recognised."""
+    raw = (os.getenv(name) or "").strip().lower()
+    if not raw:
+        return default
+    if raw in ("1", "true", "yes", "on"):
+        return True
+    if raw in ("0", "false", "no", "off"):
+        return False
+    logger.warning("Invalid %s=%r, using %s instead.", name, raw, default)
+    return default
+
+
+@dataclass
+class LLMSettings:
+    """
+    Tunables for `invoke_llm`, one environment variable each.
+
+    Attributes:
+        tiers: The fallback chain, tried in order (LLM_MODELS, plus LLM_LOCAL_BASE_URL if set).
+        deadline: Total seconds allowed for one prompt across all attempts (LLM_DEADLINE_SECONDS).
+        attempt_timeout: Seconds allowed for a single attempt (LLM_ATTEMPT_TIMEOUT).
+        max_retries: Extra attempts per tier after the first one fails (LLM_MAX_RETRIES).
+        max_workers: Worker threads shared by all LLM requests, including hedges (LLM_MAX_WORKERS).
+        backoff: Base delay in seconds between retries, doubled each time (LLM_BACKOFF_SECONDS).
+        hedge_enabled: Whether to send a duplicate request for slow calls (LLM_HEDGE_ENABLED).
+        hedge_percentile: Latency percentile used as the hedging delay (LLM_HEDGE_PERCENTILE).
+        hedge_min_samples: Samples needed before the percentile is trusted (LLM_HEDGE_MIN_SAMPLES).
+        hedge_initial_delay: Hedging delay used until enough samples exist (LLM_HEDGE_INITIAL_DELAY).
+        latency_window: Number of recent latencies kept per tier (LLM_LATENCY_WINDOW).
+        latency_log: Optional JSONL file that every attempt and call latency is appended to (LLM_LATENCY_LOG).
+    """
+    tiers: List[ModelTier] = field(default_factory=lambda: [ModelTier("gpt-4o-mini")])
+    deadline: float = 60.0
+    attempt_timeout: float = 20.0
+    max_retries: int = 1
+    max_workers: int = 16
+    backoff: float = 1.0
+    hedge_enabled: bool = True
+    hedge_percentile: float = 95.0
+    hedge_min_samples: int = 20
+    hedge_initial_delay: float = 8.0
+    latency_window: int = 500
+    latency_log: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "LLMSettings":
+        tiers = _parse_tiers(os.getenv("LLM_MODELS", "gpt-4o-mini"))
+        local_base_url = os.getenv("LLM_LOCAL_BASE_URL")
+        if local_base_url:
+            tiers.append(ModelTier(
+                model=os.getenv("LLM_LOCAL_MODEL", "local-model"),
+                base_url=local_base_url,
+                api_key=os.getenv("LLM_LOCAL_API_KEY", PLACEHOLDER_API_KEY),
+            ))
+
+        return cls(
+            tiers=tiers or [ModelTier("gpt-4o-mini")],
+            deadline=_env_number("LLM_DEADLINE_SECONDS", cls.deadline, float, minimum=0.1),
+            attempt_timeout=_env_number("LLM_ATTEMPT_TIMEOUT", cls.attempt_timeout, float, minimum=0.1),
+            max_retries=_env_number("LLM_MAX_RETRIES", cls.max_retries, int, minimum=0),
+            max_workers=_env_number("LLM_MAX_WORKERS", cls.max_workers, int, minimum=1),
+            backoff=_env_number("LLM_BACKOFF_SECONDS", cls.backoff, float, minimum=0.0),
+            hedge_enabled=_env_bool("LLM_HEDGE_ENABLED", cls.hedge_enabled),
+            hedge_percentile=_env_number("LLM_HEDGE_PERCENTILE", cls.hedge_percentile, float,
+                                         minimum=0.0, maximum=100.0),
+            hedge_min_samples=_env_number("LLM_HEDGE_MIN_SAMPLES", cls.hedge_min_samples, int, minimum=0),
+            hedge_initial_delay=_env_number("LLM_HEDGE_INITIAL_DELAY", cls.hedge_initial_delay, float, minimum=0.0),
+            latency_window=_env_number("LLM_LATENCY_WINDOW", cls.latency_window, int, minimum=1),
+            latency_log=os.getenv("LLM_LATENCY_LOG") or None,
+        )
+
+
+class LatencyTracker:
+    """
+    Keeps rolling windows of LLM latencies: one per tier for single attempts, and one
+    for whole `invoke_llm` calls as the caller sees them.
+
+    Attempt latencies run from submission to the worker pool, so queue wait is included.
+    Successful attempts (including ones that lost a hedge) and timed-out attempts feed the
+    windows, so the tail is not hidden; a timeout counts at the time the caller gave up.
+    Every sample, including failed and cancelled attempts, can also be appended to a
+    JSONL log with its outcome. Log lines are written by a background listener thread, so
+    workers never wait on disk I/O.
+    `stats()` exposes p50/p95/p99 so the hedging percentile can be tuned against real p99.
+    """
+
+    def __init__(self, window: int, log_path: Optional[str] = None):
+        self._window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._calls: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+        # The same queue-and-listener setup as src/core/logger.py, writing bare JSON lines to one open file
+        self._log_writer: Optional[logging.Logger] = None
+        if log_path:
+            log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            file_handler = logging.FileHandler(log_path, encoding="utf-8")
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            listener = QueueListener(log_queue, file_handler)
+            listener.start()
+            atexit.register(listener.stop)
+
+            self._log_writer = logging.getLogger("src.core.llm.latency_log")
+            self._log_writer.setLevel(logging.INFO)
+            self._log_writer.propagate = False
+            self._log_writer.addHandler(QueueHandler(log_queue))
+
+    def _log(self, entry: Dict[str, Any]) -> None:
+        """Queues one JSONL entry. Call without `_lock` held."""
+        if self._log_writer:
+            self._log_writer.info(json.dumps(dict(entry, timestamp=time.time())))
+
+    def record_attempt(self, label: str, latency: float, queue_wait: float, outcome: str, hedged: bool) -> None:
+        """
+        Records one attempt. `outcome` is "ok", "error", "timeout" or "cancelled". A request that
+        finished after the caller stopped waiting gets an "_abandoned" (lost a hedge) or
+        "_after_timeout" suffix; only "ok_abandoned" feeds the window, as the timeout already did.
+        """
+        with self._lock:
+            if outcome in ("ok", "ok_abandoned", "timeout"):
+                self._samples.setdefault(label, deque(maxlen=self._window)).append(latency)
+        self._log({"kind": "attempt", "tier": label, "outcome": outcome, "latency_s": round(latency, 4),
+                   "queue_s": round(queue_wait, 4), "hedged": hedged})
+
+    def record_call(self, latency: float, outcome: str, attempts: int) -> None:
+        """Records the end-to-end latency of one `invoke_llm` call ("ok" or "failed")."""
+        with self._lock:
+            self._calls.append(latency)
+        self._log({"kind": "call", "outcome": outcome, "latency_s": round(latency, 4), "attempts": attempts})
+
+    @staticmethod
+    def _percentile(samples: List[float], percentile: float) -> Optional[float]:
+        if not samples:
+            return None
+        samples = sorted(samples)
+        rank = max(0, min(len(samples) - 1, math.ceil(percentile / 100 * len(samples)) - 1))
+        return samples[rank]
+
+    def percentile(self, label: str, percentile: float) -> Optional[float]:
+        """Returns the nearest-rank attempt percentile for a tier, or None if there are no samples."""
+        with self._lock:
+            samples = list(self._samples.get(label, ()))
+        return self._percentile(samples, percentile)
+
+    def count(self, label: str) -> int:
+        with self._lock:
+            return len(self._samples.get(label, ()))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the sample count and p50/p95/p99 latency (seconds) per tier and for whole calls."""
+        with self._lock:
+            windows = {label: list(samples) for label, samples in self._samples.items()}
+            calls = list(self._calls)
+
+        def summary(samples: List[float]) -> Dict[str, Any]:
+            return {"count": len(samples), **{f"p{p}": self._percentile(samples, p) for p in (50, 95, 99)}}
+
+        return {"attempts": {label: summary(samples) for label, samples in windows.items()},
+                "calls": summary(calls)}
+
+
+settings = LLMSettings.from_env()
+latency_tracker = LatencyTracker(settings.latency_window, settings.latency_log)
+
+# Worker threads for LLM requests. A losing hedged request cannot be cancelled
+# mid-flight, so it is simply left to finish in the background and keeps its
+# worker busy until then. `_in_flight` counts submitted requests that have not
+# finished yet, so hedges are only sent when a worker is actually free.
+_executor = ThreadPoolExecutor(max_workers=settings.max_workers, thread_name_prefix="llm")
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+_clients: Dict[Tuple[ModelTier, float], ChatOpenAI] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(tier: ModelTier, temperature: float) -> ChatOpenAI:
+    """Returns a cached client for a tier. Retries are handled here, so the client's own are disabled."""
+    key = (tier, temperature)
+    with _clients_lock:
+        if key not in _clients:
+            kwargs: Dict[str, Any] = {
+                "model": tier.model,
+                "temperature": temperature,
+                "timeout": settings.attempt_timeout,
+                "max_retries": 0,
+            }
+            if tier.base_url:
+                # Never let a custom endpoint fall back to OPENAI_API_KEY
+                kwargs["base_url"] = tier.base_url
+                kwargs["api_key"] = tier.api_key or PLACEHOLDER_API_KEY
+            elif tier.api_key:
+                kwargs["api_key"] = tier.api_key
+            _clients[key] = ChatOpenAI(**kwargs)
+        return _clients[key]
+
+
+def _request_finished(_: Future) -> None:
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+
+class _Attempt:
+    """Timing and bookkeeping for one request sent to the worker pool."""
+
+    def __init__(self, tier: ModelTier, hedged: bool):
+        self.tier = tier
+        self.hedged = hedged
+        self.submitted = time.monotonic()
+        self.started: Optional[float] = None
+        # Set to "abandoned" or "after_timeout" once the caller stops waiting for this request
+        self.abandoned: Optional[str] = None
+
+    def queue_wait(self, now: float) -> float:
+        return (self.started if self.started is not None else now) - self.submitted
+
+
+def _submit(client: ChatOpenAI, tier: ModelTier, prompt: str, hedged: bool) -> Tuple[Future, _Attempt]:
+    """Submits a request to the shared pool and keeps `_in_flight` up to date."""
+    global _in_flight
+    attempt = _Attempt(tier, hedged)
+    with _in_flight_lock:
+        _in_flight += 1
+    future = _executor.submit(_timed_invoke, client, attempt, prompt)
+    future.add_done_callback(_request_finished)
+    return future, attempt
+
+
+def _has_free_worker() -> bool:
+    with _in_flight_lock:
+        return _in_flight < settings.max_workers
+
+
+def _timed_invoke(client: ChatOpenAI, attempt: _Attempt, prompt: str) -> Any:
+    attempt.started = time.monotonic()
+    outcome = "error"
+    try:
+        response = client.invoke(prompt)
+        outcome = "ok"
+        return response
+    finally:
+        now = time.monotonic()
+        if attempt.abandoned:
+            outcome += f"_{attempt.abandoned}"
+        latency_tracker.record_attempt(attempt.tier.label, now - attempt.submitted, attempt.queue_wait(now),
+                                       outcome, attempt.hedged)
+
+
+def _abandon(pending: Dict[Future, _Attempt], timed_out: bool) -> None:
+    """
+    Stops waiting for pending requests. Queued ones are cancelled; running ones finish in the
+    background. On a timeout, each one is recorded at the time the caller gave up.
+    """
+    now = time.monotonic()
+    for future, attempt in pending.items():
+        attempt.abandoned = "after_timeout" if timed_out else "abandoned"
+        cancelled = future.cancel()
+        if timed_out or cancelled:
+            latency_tracker.record_attempt(attempt.tier.label, now - attempt.submitted, attempt.queue_wait(now),
+                                           "timeout" if timed_out else "cancelled", attempt.hedged)
+
+
+def hedge_delay(tier: ModelTier) -> float:
+    """Returns how long to wait for a tier before sending a duplicate request."""
+    if latency_tracker.count(tier.label) < settings.hedge_min_samples:
+        return settings.hedge_initial_delay
+    delay = latency_tracker.percentile(tier.label, settings.hedge_percentile)
+    return delay if delay is not None else settings.hedge_initial_delay
+
+
+def _hedged_call(tier: ModelTier, prompt: str, temperature: float, timeout: float) -> Any:
+    """
+    Sends one request to a tier and, if it is still running after the hedging delay,
+    a duplicate. Returns the first successful response.
+    """
+    client = _get_client(tier, temperature)
+    end = time.monotonic() + timeout
+    future, attempt = _submit(client, tier, prompt, False)
+    pending: Dict[Future, _Attempt] = {future: attempt}
+    can_hedge = settings.hedge_enabled
+    delay = hedge_delay(tier)
+    last_error: Optional[BaseException] = None
+
+    while pending:
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(pending, timeout=min(remaining, delay) if can_hedge else remaining,
+                       return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.pop(future)
+            try:
+                response = future.result()
+            except Exception as e:
+                last_error = e
+                continue
+            _abandon(pending, timed_out=False)
+            return response
+        # Only hedge a request that is slow, not one that failed; failures are retried instead.
+        # A hedge sent to a full pool would only wait in the queue, so it is skipped.
+        if can_hedge and pending and not done:
+            if _has_free_worker():
+                future, attempt = _submit(client, tier, prompt, True)
+                pending[future] = attempt
+            can_hedge = False
+
+    if pending:
+        _abandon(pending, timed_out=True)
+        raise TimeoutError(f"no response within {timeout:.1f}s")
+    raise last_error or RuntimeError("request failed without an error")
+
+
+def invoke_llm(prompt: str, temperature: float = 0, deadline: Optional[float] = None) -> Any:
+    """
+    Sends a prompt through the fallback chain and returns the first successful response.
+
+    Each tier is tried up to `max_retries + 1` times with exponential backoff, and every
+    attempt is capped by both `attempt_timeout` and the time left before the deadline.
+
+    Raises:
+        LLMCallError: If every tier failed or the deadline was reached.
+    """
+    deadline = settings.deadline if deadline is None else deadline
+    start = time.monotonic()
+    end = start + deadline
+    failures: List[str] = []
+
+    for tier in settings.tiers:
+        for attempt in range(settings.max_retries + 1):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                latency_tracker.record_call(time.monotonic() - start, "failed", len(failures))
+                raise LLMCallError(f"LLM deadline of {deadline:.1f}s exceeded. Attempts: {'; '.join(failures)}")
+            try:
+                response = _hedged_call(tier, prompt, temperature, min(settings.attempt_timeout, remaining))
+                latency_tracker.record_call(time.monotonic() - start, "ok", len(failures) + 1)
+                return response
+            except Exception as e:
+                failures.append(f"{tier.label} (attempt {attempt + 1}): {e}")
+
+            if attempt < settings.max_retries:
+                # Full jitter keeps concurrent runs from retrying in lockstep
+                pause = random.uniform(0, settings.backoff * 2 ** attempt)
+                time.sleep(max(0.0, min(pause, end - time.monotonic())))
+
+    latency_tracker.record_call(time.monotonic() - start, "failed", len(failures))
+    raise LLMCallError(f"All LLM tiers failed. Attempts: {'; '.join(failures)}")
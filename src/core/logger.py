@@ -0,0 +1,53 @@
+"""
+This file sets up the leveled, asynchronous logger used across the workflow.
+
+Log records are pushed onto a queue and written to stderr by a background listener
+thread, so the agent nodes never block on console I/O. Logging is quiet by default:
+only warnings and errors are shown unless LOG_LEVEL is set (e.g. LOG_LEVEL=DEBUG to
+see every agent's full output).
+"""
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# All modules live under the "src" package, so configuring its logger covers every agent and tool.
+def _level_from_env() -> int:
+    """Reads LOG_LEVEL as a level name or number, falling back to WARNING if it is not recognised."""
+    value = (os.getenv("LOG_LEVEL") or "WARNING").strip().upper()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value)
+    if isinstance(level, int):
+        return level
+    logging.getLogger(__name__).warning("Unknown LOG_LEVEL %r, using WARNING instead.", value)
+    return logging.WARNING
+
+
+_package_logger = logging.getLogger("src")
+_package_logger.setLevel(_level_from_env())
+_package_logger.propagate = False
+
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_package_logger.addHandler(QueueHandler(_log_queue))
+
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+_listener = QueueListener(_log_queue, _stream_handler)
+_listener.start()
+# Flush any queued records before the interpreter exits
+atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Returns a logger for a module. Pass `__name__` so the name sits under the "src" package.
+    Modules that can be run directly (and so be named "__main__") should pass their full name instead.
+    """
+    return logging.getLogger(name)
@@ -1,26 +1,31 @@
 """
 This file defines the shared state for the AI marketing agent system.
 It acts as the central "memory" that is passed between the different agent nodes in the graph.
+
+Nodes return only the keys they change, and LangGraph merges those partial updates into the state.
+Large, immutable inputs are kept in `src.core.store` and referenced here by content hash.
 """
-from typing import TypedDict, List, Optional, Dict
+import operator
+from typing import Annotated, TypedDict, List, Optional, Dict
 
 class AgentState(TypedDict):
     """
     The shared state for the AI marketing agent.
 
     Attributes:
-        cafe_context: The content of the cafe_context.md file.
+        cafe_context_ref: The content hash of the cafe_context.md text in the content store.
         weather_summary: A summary of the weather for the day.
         food_recommendation: A food recommendation based on the weather.
         events: A list of the top 5 events of the day, each with a title and postcode.
         message_ideas: A list of 5 message ideas, one for each event.
         brief: The final, structured marketing brief.
         errors: A list to accumulate any errors that occur during the workflow.
+            Nodes return only their new errors, which are appended to this list.
     """
-    cafe_context: str
+    cafe_context_ref: str
     weather_summary: Optional[str]
     food_recommendation: Optional[str]
     events: Optional[List[Dict[str, str]]]
     message_ideas: Optional[List[str]]
     brief: Optional[dict]
-    errors: List[str]
\ No newline at end of file
+    errors: Annotated[List[str], operator.add]
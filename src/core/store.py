@@ -0,0 +1,67 @@
+"""
+This file holds large, immutable inputs (such as the cafe playbook) outside the agent state.
+
+The state only carries a short content hash, so the full text is not copied into every
+step of the workflow. Identical content is stored once, however many runs use it.
+
+A run pins its content with `pin_content` and releases it with `release_content` when it
+finishes. Pinned content is never evicted, so a reference cannot disappear mid-run.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict
+
+# Unpinned entries past this count are dropped oldest first, so repeated playbook edits do not grow memory forever
+MAX_ENTRIES = 32
+
+_store: "OrderedDict[str, str]" = OrderedDict()
+_pins: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def _evict() -> None:
+    """Drops the oldest unpinned entries while the store is over MAX_ENTRIES. Call with `_lock` held."""
+    excess = len(_store) - MAX_ENTRIES
+    if excess <= 0:
+        return
+    for ref in [ref for ref in _store if ref not in _pins][:excess]:
+        del _store[ref]
+
+
+def pin_content(text: str) -> str:
+    """
+    Stores a piece of text, pins it for the caller and returns its SHA-256 content hash,
+    used as the reference. Every call must be matched by a `release_content` call.
+    """
+    ref = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    with _lock:
+        _store[ref] = text
+        _store.move_to_end(ref)
+        _pins[ref] = _pins.get(ref, 0) + 1
+        _evict()
+    return ref
+
+
+def release_content(ref: str) -> None:
+    """
+    Releases one pin on a reference. Once no pins are left the entry can be evicted.
+    """
+    with _lock:
+        remaining = _pins.get(ref, 0) - 1
+        if remaining > 0:
+            _pins[ref] = remaining
+        else:
+            _pins.pop(ref, None)
+        _evict()
+
+
+def get_content(ref: str) -> str:
+    """
+    Returns the text stored under a reference.
+
+    Raises:
+        KeyError: If the reference is unknown or has been evicted.
+    """
+    with _lock:
+        return _store[ref]
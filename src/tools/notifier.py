@@ -7,11 +7,16 @@ It reads the Discord webhook URL from the environment variables and formats the
 content into a readable "embed" message.
 """
 
+import logging
 import os
 import requests
 from dotenv import load_dotenv
 from typing import Dict, Any
 
+# This module has no src.* imports so it can still run on its own. Inside the app, the fixed
+# name puts it under the "src" logger configured in src/core/logger.py, even when run as __main__.
+logger = logging.getLogger("src.tools.notifier")
+
 # Load environment variables from the .env file in the project root
 load_dotenv()
 
@@ -27,12 +32,12 @@ def send_to_discord(state: Dict[str, Any]) -> None:
 
     # 1. Validate the Webhook URL
     if not webhook_url:
-        print("ERROR: DISCORD_WEBHOOK_URL not found in .env file. Cannot send notification.")
+        logger.error("DISCORD_WEBHOOK_URL not found in .env file. Cannot send notification.")
         return
 
     # 2. Validate the input content
     if not state or not isinstance(state, dict):
-        print("ERROR: State is invalid. Cannot send notification.")
+        logger.error("State is invalid. Cannot send notification.")
         return
 
     weather_summary = state.get("weather_summary", "*No weather summary was generated.*")
@@ -72,13 +77,15 @@ def send_to_discord(state: Dict[str, Any]) -> None:
         response = requests.post(webhook_url, json=data, timeout=10)
         # This will raise an exception for HTTP error codes (4xx or 5xx)
         response.raise_for_status()
-        print("Successfully sent post to Discord for review.")
+        logger.info("Successfully sent post to Discord for review.")
     except requests.exceptions.RequestException as e:
-        print(f"Error sending post to Discord: {e}")
+        logger.error("Error sending post to Discord: %s", e)
 
 
 # This block allows you to test the notifier directly
 if __name__ == "__main__":
+    # Show INFO messages so the test reports whether the post was sent
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
     print("Running notifier.py in standalone test mode...")
 
     # Create a dummy post to send